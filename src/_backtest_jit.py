@@ -0,0 +1,61 @@
+"""
+Compiled backtest kernel - the sequential entry/exit state machine.
+"""
+
+import numpy as np
+from src._jit import njit
+
+
+@njit(cache=True)
+def _record_trade(out_entry_i, out_exit_i, out_ep, out_xp, k, position, i, ep, xp):
+    """Record the trade entered at bar `position` and exited at bar i; returns the new trade count."""
+    out_entry_i[k] = position
+    out_exit_i[k] = i
+    out_ep[k] = ep[position]
+    out_xp[k] = xp[i]
+    return k + 1
+
+
+@njit(cache=True)
+def _run_loop(entry, exit_, ep, xp):
+    """
+    Walk entry/exit signals bar by bar and record completed trades.
+    
+    Args:
+        entry: Boolean array of entry signals
+        exit_: Boolean array of exit signals
+        ep: Entry price per bar
+        xp: Exit price per bar
+        
+    Returns:
+        Tuple (entry_idx, exit_idx, entry_price, exit_price, n_trades); the
+        output arrays are sized to the input and only the first n_trades
+        entries are valid.
+    """
+    n = len(entry)
+    out_entry_i = np.empty(n, dtype=np.int32)
+    out_exit_i = np.empty(n, dtype=np.int32)
+    out_ep = np.empty(n, dtype=np.float64)
+    out_xp = np.empty(n, dtype=np.float64)
+    
+    k = 0
+    position = -1  # -1 = no position, otherwise bar index of entry
+    last = n - 1
+    
+    for i in range(n):
+        # Exit existing position first
+        if position >= 0 and exit_[i]:
+            k = _record_trade(out_entry_i, out_exit_i, out_ep, out_xp, k, position, i, ep, xp)
+            position = -1
+        
+        # Enter new position
+        if position < 0 and entry[i]:
+            position = i
+        
+        # Close any position still open at the end, including one entered
+        # on the last bar
+        if position >= 0 and i == last:
+            k = _record_trade(out_entry_i, out_exit_i, out_ep, out_xp, k, position, i, ep, xp)
+            position = -1
+    
+    return out_entry_i, out_exit_i, out_ep, out_xp, k
@@ -0,0 +1,114 @@
+"""
+Compiled indicator kernels, optionally built ahead of time.
+
+The kernels are JIT-compiled with Numba on first use (and cached on disk).
+To skip even that for short-lived scripts, build the ahead-of-time
+extension once with:
+
+    python -m src._indicator_kernels
+
+which writes src/_indicator_kernels_aot.*.so; when it is present it is used
+instead of the JIT versions. Rebuild it after changing a kernel.
+"""
+
+import functools
+
+import numpy as np
+import pandas as pd
+from src._jit import njit
+
+try:
+    from src import _indicator_kernels_aot as _aot
+except ImportError:
+    _aot = None
+
+
+@functools.lru_cache(maxsize=1)
+def gap_weighting_renormalized() -> bool:
+    """
+    Whether the installed pandas special-cases alpha = 0.5 after NaN gaps in
+    ``ewm(adjust=False)``.
+    
+    After a gap the old value's weight has decayed to (1 - alpha) ** (gap + 1)
+    and the new value normally gets weight alpha, the two being divided by
+    their sum. pandas 3 instead gives the new value 1 - old_weight when
+    com == 1 (alpha = 0.5, i.e. span=3); pandas 2 does not. Found by asking
+    pandas once, so the kernels follow whichever version is in use.
+    """
+    probe = pd.Series([1.0, np.nan, 2.0]).ewm(alpha=0.5, adjust=False).mean().iloc[-1]
+    # Special-cased: 0.25 * 1 + 0.75 * 2 = 1.75; otherwise (0.25 * 1 + 0.5 * 2) / 0.75
+    return bool(np.isclose(probe, 1.75))
+
+
+def _ema(values, alpha, renormalized):
+    """
+    Recursive EMA, as ``ewm(alpha=alpha, adjust=False).mean()`` computes it.
+    
+    Leading NaNs stay NaN; a NaN later on repeats the previous value, and the
+    next observation is weighted against the decay accumulated over the gap,
+    as described in gap_weighting_renormalized().
+    """
+    n = len(values)
+    out = np.empty(n)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    renormalize_gaps = renormalized and 1.0 / alpha - 1.0 == 1.0
+    weighted = values[0]
+    old_weight = 1.0
+    new_weight = alpha
+    out[0] = weighted
+    for i in range(1, n):
+        current = values[i]
+        is_observation = current == current
+        if weighted == weighted:
+            old_weight *= decay
+            if renormalize_gaps:
+                new_weight = 1.0 - old_weight
+            if is_observation:
+                if weighted != current:
+                    weighted = (old_weight * weighted + new_weight * current) / (old_weight + new_weight)
+                old_weight = 1.0
+        elif is_observation:
+            weighted = current
+        out[i] = weighted
+    return out
+
+
+_ema_jit = njit(cache=True)(_ema)
+
+# Ahead-of-time entry points by input dtype; signatures match the exports below
+_AOT_EMA = {np.dtype(np.float64): "ema_f8", np.dtype(np.float32): "ema_f4"}
+
+
+def ema_kernel(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    EMA of a float32 or float64 array as float64, see _ema.
+    
+    Args:
+        values: 1-D float array
+        alpha: Smoothing factor
+    
+    Returns:
+        float64 array of EMA values
+    """
+    renormalized = gap_weighting_renormalized()
+    if _aot is not None and values.dtype in _AOT_EMA:
+        return getattr(_aot, _AOT_EMA[values.dtype])(values, float(alpha), renormalized)
+    return _ema_jit(values, alpha, renormalized)
+
+
+def _build_aot():
+    """Compile the ahead-of-time extension module next to this file."""
+    import os
+    from numba.pycc import CC
+    
+    cc = CC("_indicator_kernels_aot")
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.export("ema_f8", "f8[:](f8[:], f8, b1)")(_ema)
+    cc.export("ema_f4", "f8[:](f4[:], f8, b1)")(_ema)
+    cc.compile()
+
+
+if __name__ == "__main__":
+    _build_aot()
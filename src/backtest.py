@@ -2,10 +2,20 @@
 Backtest Simulator - Executes trading strategies and calculates performance metrics.
 """
 
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any, Optional, Callable
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Callable, Tuple
+from dataclasses import dataclass, field
+
+from src._backtest_jit import _run_loop
+
+
+# Trade counts above which metric reductions switch from Python to NumPy
+NUMPY_REDUCTION_MIN_SIZE = 1000
 
 
 @dataclass
@@ -20,9 +30,40 @@ class Trade:
 
 
 @dataclass
-class BacktestResult:
-    """Results from a backtest simulation."""
-    trades: List[Trade]
+class TradeArrays:
+    """Trades stored column-wise: one array per Trade field."""
+    entry_date: np.ndarray
+    exit_date: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    pnl: np.ndarray
+    return_pct: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.pnl)
+    
+    def to_trades(self) -> List[Trade]:
+        """Build one Trade object per row."""
+        return [
+            Trade(
+                entry_date=entry_date,
+                exit_date=exit_date,
+                entry_price=entry_price,
+                exit_price=exit_price,
+                pnl=pnl,
+                return_pct=return_pct
+            )
+            for entry_date, exit_date, entry_price, exit_price, pnl, return_pct in zip(
+                pd.Index(self.entry_date), pd.Index(self.exit_date),
+                self.entry_price.tolist(), self.exit_price.tolist(),
+                self.pnl.tolist(), self.return_pct.tolist()
+            )
+        ]
+
+
+@dataclass
+class BacktestMetrics:
+    """Scalar performance metrics from a backtest simulation."""
     total_return: float
     total_return_pct: float
     max_drawdown: float
@@ -33,6 +74,52 @@ class BacktestResult:
     sharpe_ratio: Optional[float] = None
 
 
+class _LazyTrades:
+    """
+    Descriptor behind BacktestResult.trades: stores an explicit Trade list,
+    or builds one from the result's trade_arrays on first read.
+    """
+    
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            # Class access: the dataclass field default
+            return None
+        trades = obj.__dict__.get("_trades")
+        if trades is None:
+            trade_arrays = obj.__dict__.get("trade_arrays")
+            trades = trade_arrays.to_trades() if trade_arrays is not None else []
+            obj.__dict__["_trades"] = trades
+        return trades
+    
+    def __set__(self, obj, value):
+        obj.__dict__["_trades"] = list(value) if value is not None else None
+
+
+@dataclass(init=False)
+class BacktestResult(BacktestMetrics):
+    """
+    Results from a backtest simulation.
+    
+    Trades are kept as TradeArrays; the list of Trade objects is only built
+    when ``trades`` is first read (which includes comparing, printing,
+    dataclasses.asdict and dataclasses.replace), so sweeps that only read
+    the metrics never allocate them.
+    
+    The constructor takes ``trades`` first, followed by the metrics in
+    BacktestMetrics order, so results can also be built from a list of Trade
+    objects (e.g. fixtures or deserialized results) instead of trade_arrays.
+    """
+    trades: Optional[List[Trade]] = _LazyTrades()
+    
+    def __init__(self, trades: Optional[List[Trade]] = None, *args: Any,
+                 trade_arrays: Optional[TradeArrays] = None, **metrics: Any):
+        BacktestMetrics.__init__(self, *args, **metrics)
+        # Column-wise trades; a plain attribute rather than a field, so it is
+        # not duplicated into asdict() or compared alongside trades
+        self.trade_arrays = trade_arrays
+        self.trades = trades
+
+
 class BacktestSimulator:
     """Simulator for backtesting trading strategies."""
     
@@ -59,75 +146,98 @@ class BacktestSimulator:
         Returns:
             BacktestResult with performance metrics
         """
+        arrays = self._prepare_arrays(df, signals, entry_price_col, exit_price_col)
+        return self._run_arrays(*arrays)
+    
+    def run_batch(self, jobs: List[Tuple[pd.DataFrame, pd.DataFrame]],
+                  entry_price_col: str = "close", exit_price_col: str = "close",
+                  max_workers: Optional[int] = None) -> List[BacktestResult]:
+        """
+        Run many independent backtests in parallel worker processes.
+        
+        Each job is a (df, signals) pair, e.g. one strategy per instrument or one
+        point of a parameter grid. Jobs are shipped to workers as NumPy arrays
+        rather than DataFrames to keep pickling cheap. On platforms that spawn
+        workers (Windows, macOS) call this from under ``if __name__ == "__main__":``.
+        
+        Args:
+            jobs: List of (df, signals) tuples, as accepted by run()
+            entry_price_col: Column to use for entry price (default: "close")
+            exit_price_col: Column to use for exit price (default: "close")
+            max_workers: Number of worker processes (default: os.cpu_count())
+            
+        Returns:
+            List of BacktestResult, in the same order as jobs
+        """
+        payloads = [
+            (self.initial_capital,) + self._prepare_arrays(df, signals, entry_price_col, exit_price_col)
+            for df, signals in jobs
+        ]
+        
+        workers = max_workers or os.cpu_count() or 1
+        if workers == 1 or len(payloads) <= 1:
+            return [_run_one(payload) for payload in payloads]
+        
+        chunksize = max(1, len(payloads) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_run_one, payloads, chunksize=chunksize))
+    
+    @staticmethod
+    def _prepare_arrays(df: pd.DataFrame, signals: pd.DataFrame,
+                        entry_price_col: str, exit_price_col: str) -> Tuple[np.ndarray, ...]:
+        """Validate inputs and extract (dates, entry, exit, entry_prices, exit_prices) arrays."""
         if entry_price_col not in df.columns:
             raise ValueError(f"Entry price column '{entry_price_col}' not found")
         if exit_price_col not in df.columns:
             raise ValueError(f"Exit price column '{exit_price_col}' not found")
         
-        trades = []
-        position = None  # None = no position, or dict with entry info
+        # Signals are read positionally below; align by label once up front
+        # (as the old per-bar signals.loc lookups did) if the indexes differ
+        if not signals.index.equals(df.index):
+            missing = df.index.difference(signals.index)
+            if len(missing) > 0:
+                raise ValueError(f"Signals missing for {len(missing)} bar(s), first: {missing[0]}")
+            signals = signals.reindex(df.index)
         
-        for idx, row in df.iterrows():
-            entry_signal = signals.loc[idx, 'entry'] if 'entry' in signals.columns else False
-            exit_signal = signals.loc[idx, 'exit'] if 'exit' in signals.columns else False
-            
-            # Exit existing position first
-            if position is not None and exit_signal:
-                exit_price = row[exit_price_col]
-                entry_price = position['entry_price']
-                entry_date = position['entry_date']
-                
-                pnl = exit_price - entry_price
-                return_pct = (pnl / entry_price) * 100
-                
-                trade = Trade(
-                    entry_date=entry_date,
-                    exit_date=idx,
-                    entry_price=entry_price,
-                    exit_price=exit_price,
-                    pnl=pnl,
-                    return_pct=return_pct
-                )
-                trades.append(trade)
-                position = None
-            
-            # Enter new position
-            if position is None and entry_signal:
-                entry_price = row[entry_price_col]
-                position = {
-                    'entry_date': idx,
-                    'entry_price': entry_price
-                }
-        
-        # Close any open position at the end
-        if position is not None:
-            last_idx = df.index[-1]
-            last_row = df.loc[last_idx]
-            exit_price = last_row[exit_price_col]
-            entry_price = position['entry_price']
-            entry_date = position['entry_date']
-            
-            pnl = exit_price - entry_price
-            return_pct = (pnl / entry_price) * 100
-            
-            trade = Trade(
-                entry_date=entry_date,
-                exit_date=last_idx,
-                entry_price=entry_price,
-                exit_price=exit_price,
-                pnl=pnl,
-                return_pct=return_pct
-            )
-            trades.append(trade)
+        n = len(df)
+        entry_arr = (signals['entry'].to_numpy(dtype=np.bool_) if 'entry' in signals.columns
+                     else np.zeros(n, dtype=np.bool_))
+        exit_arr = (signals['exit'].to_numpy(dtype=np.bool_) if 'exit' in signals.columns
+                    else np.zeros(n, dtype=np.bool_))
+        entry_prices = df[entry_price_col].to_numpy(dtype=np.float64)
+        exit_prices = df[exit_price_col].to_numpy(dtype=np.float64)
+        
+        return df.index.to_numpy(), entry_arr, exit_arr, entry_prices, exit_prices
+    
+    def _run_arrays(self, dates: np.ndarray, entry_arr: np.ndarray, exit_arr: np.ndarray,
+                    entry_prices: np.ndarray, exit_prices: np.ndarray) -> BacktestResult:
+        """Run the backtest kernel on prepared arrays and compute metrics."""
+        entry_i, exit_i, ep, xp, k = _run_loop(entry_arr, exit_arr, entry_prices, exit_prices)
+        
+        # Trades stay column-wise (one array per field); Trade objects are only
+        # built if the caller reads result.trades
+        entry_i, exit_i, ep, xp = entry_i[:k], exit_i[:k], ep[:k], xp[:k]
+        pnl = xp - ep
+        trade_arrays = TradeArrays(
+            entry_date=dates[entry_i],
+            exit_date=dates[exit_i],
+            entry_price=ep,
+            exit_price=xp,
+            pnl=pnl,
+            return_pct=(pnl / ep) * 100
+        )
         
         # Calculate metrics
-        return self._calculate_metrics(trades, df)
+        return self._calculate_metrics(trade_arrays)
     
-    def _calculate_metrics(self, trades: List[Trade], df: pd.DataFrame) -> BacktestResult:
-        """Calculate performance metrics from trades."""
-        if not trades:
+    def _calculate_metrics(self, trade_arrays: TradeArrays) -> BacktestResult:
+        """Calculate performance metrics from column-wise trades."""
+        pnl = trade_arrays.pnl
+        returns_arr = trade_arrays.return_pct
+        
+        if len(returns_arr) == 0:
             return BacktestResult(
-                trades=[],
+                trade_arrays=trade_arrays,
                 total_return=0.0,
                 total_return_pct=0.0,
                 max_drawdown=0.0,
@@ -139,60 +249,45 @@ class BacktestSimulator:
             )
         
         # Calculate returns
-        returns = [trade.return_pct for trade in trades]
-        total_return_pct = sum(returns)
+        total_return_pct = float(returns_arr.sum())
         total_return = self.initial_capital * (total_return_pct / 100.0)
         
-        # Calculate drawdown
-        equity_curve = []
-        current_equity = self.initial_capital
-        
-        for trade in trades:
-            current_equity *= (1 + trade.return_pct / 100.0)
-            equity_curve.append(current_equity)
-        
-        if equity_curve:
-            peak = equity_curve[0]
-            max_dd = 0.0
-            max_dd_pct = 0.0
-            
-            for equity in equity_curve:
-                if equity > peak:
-                    peak = equity
-                drawdown = peak - equity
-                drawdown_pct = ((peak - equity) / peak) * 100.0
-                
-                if drawdown > max_dd:
-                    max_dd = drawdown
-                if drawdown_pct > max_dd_pct:
-                    max_dd_pct = drawdown_pct
-            
-            max_drawdown = max_dd
-            max_drawdown_pct = max_dd_pct
-        else:
-            max_drawdown = 0.0
-            max_drawdown_pct = 0.0
+        # Calculate drawdown from the compounded equity curve
+        equity = self.initial_capital * np.cumprod(1.0 + returns_arr / 100.0)
+        # NaN returns (e.g. from a NaN price) make the rest of the curve NaN;
+        # fmax skips those points, as the old per-trade loop did
+        running_peak = np.fmax.accumulate(equity)
+        drawdown = running_peak - equity
+        max_drawdown = float(np.fmax.reduce(drawdown, initial=0.0))
+        max_drawdown_pct = float(np.fmax.reduce(drawdown / running_peak, initial=0.0) * 100.0)
         
         # Calculate win rate
-        winning_trades = [t for t in trades if t.pnl > 0]
-        win_rate = len(winning_trades) / len(trades) if trades else 0.0
+        win_rate = float((pnl > 0).mean())
         
-        # Average return
-        avg_return = np.mean(returns) if returns else 0.0
+        # Average return and spread, each reduced once and reused below. For
+        # typical trade counts plain Python arithmetic beats ufunc dispatch.
+        n_trades = len(returns_arr)
+        if n_trades > NUMPY_REDUCTION_MIN_SIZE:
+            avg_return = float(returns_arr.mean())
+            std_return = float(returns_arr.std(ddof=0))
+        else:
+            returns = returns_arr.tolist()
+            avg_return = sum(returns) / n_trades
+            std_return = math.sqrt(sum((r - avg_return) ** 2 for r in returns) / n_trades)
         
         # Sharpe ratio (simplified - assumes daily returns)
-        if len(returns) > 1:
-            sharpe_ratio = np.mean(returns) / np.std(returns) * np.sqrt(252) if np.std(returns) > 0 else None
+        if n_trades > 1 and std_return > 0:
+            sharpe_ratio = avg_return / std_return * np.sqrt(252)
         else:
             sharpe_ratio = None
         
         return BacktestResult(
-            trades=trades,
+            trade_arrays=trade_arrays,
             total_return=total_return,
             total_return_pct=total_return_pct,
             max_drawdown=max_drawdown,
             max_drawdown_pct=max_drawdown_pct,
-            num_trades=len(trades),
+            num_trades=n_trades,
             win_rate=win_rate,
             avg_return=avg_return,
             sharpe_ratio=sharpe_ratio
@@ -216,6 +311,12 @@ class BacktestSimulator:
         return self.run(df, signals, entry_price_col, exit_price_col)
 
 
+def _run_one(payload: Tuple) -> BacktestResult:
+    """Worker entry point for run_batch: (initial_capital, *arrays) -> BacktestResult."""
+    initial_capital, *arrays = payload
+    return BacktestSimulator(initial_capital=initial_capital)._run_arrays(*arrays)
+
+
 def run_backtest(df: pd.DataFrame, signals: pd.DataFrame, 
                 initial_capital: float = 100000.0) -> BacktestResult:
     """
@@ -1,5 +1,10 @@
 """
 Code Generator - Converts AST to executable Python code.
+
+The AST is translated into the source of a single straight-line Python
+function (one statement per distinct subexpression) which is compiled once
+with compile()/exec. Evaluating a strategy then runs that function directly,
+with no AST walking or per-node Python calls.
 """
 
 import sys
@@ -10,16 +15,131 @@ parent_dir = Path(__file__).parent.parent
 if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
-from typing import Dict, List, Any, Callable
+import json
+from typing import Dict, List, Any, Callable, Optional
+import numpy as np
 import pandas as pd
 from src.indicators import (
     sma, rsi, ema,
     yesterday, last_week, n_days_ago,
     change, percent_change,
-    crosses_above, crosses_below
+    crosses_above, crosses_below,
+    fused_and, fused_or
 )
 
 
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """Look up a DataFrame column, raising ValueError if it is missing."""
+    if name not in df.columns:
+        raise ValueError(f"Series '{name}' not found in DataFrame")
+    return df[name]
+
+
+def _column_or_literal(df: pd.DataFrame, name: str, literal: Optional[float]) -> Any:
+    """Resolve a bare string operand: a column if present, else its numeric value."""
+    # Try as series name
+    if name in df.columns:
+        return df[name].to_numpy()
+    # Otherwise treat as literal
+    if literal is None:
+        raise ValueError(f"Cannot evaluate expression: {name}")
+    return literal
+
+
+def _indicator(df: pd.DataFrame, cache: Optional[Dict[Any, np.ndarray]], func: Callable,
+               series_name: str, period: Any, key: Any, precomputed: Optional[str],
+               use_precomputed: bool) -> np.ndarray:
+    """
+    Evaluate an indicator on a column.
+    
+    With use_precomputed, a matching column added by calculate_indicators()
+    (e.g. 'sma_20') is used as is, provided it has the dtype the indicator
+    would be computed in; otherwise the result stored under `key` in `cache`
+    is reused, or computed and stored there.
+    """
+    if use_precomputed and precomputed is not None and precomputed in df.columns:
+        column = df[precomputed]
+        # A float32 column (calculate_indicators(dtype=np.float32)) would
+        # change the comparisons against a float64 close
+        if column.dtype == _column(df, series_name).dtype:
+            return column.to_numpy()
+    if cache is not None:
+        values = cache.get(key)
+        if values is not None:
+            return values
+    values = func(_column(df, series_name), period).to_numpy()
+    if cache is not None:
+        # Shared with every evaluator that uses this cache
+        values.flags.writeable = False
+        cache[key] = values
+    return values
+
+
+def _as_series(values: Any, index: pd.Index) -> pd.Series:
+    """Wrap an evaluated array (or broadcast a scalar) as a Series for the indicator helpers."""
+    return pd.Series(values, index=index, copy=False)
+
+
+def _cross_operand(values: Any, index: pd.Index) -> Any:
+    """Second operand of a cross function: constants are passed through unbroadcast."""
+    if np.ndim(values) == 0:
+        return values
+    return pd.Series(values, index=index, copy=False)
+
+
+def _to_signal(values: Any) -> np.ndarray:
+    """Convert an evaluated condition to a boolean array, treating NaN as False."""
+    values = np.asarray(values)
+    # Comparisons and boolean ops already yield NaN-free bool arrays
+    if values.dtype == bool:
+        return values
+    if values.ndim == 0:
+        return np.bool_(False if pd.isna(values) else values)
+    return pd.Series(values, copy=False).to_numpy(dtype=bool, na_value=False)
+
+
+def _build_signals(index: pd.Index, entry: Any, exit_: Any) -> pd.DataFrame:
+    """Assemble the signals frame from the evaluated entry/exit conditions."""
+    # Both columns live in one column-major block so each column is
+    # contiguous in memory
+    signal_block = np.zeros((len(index), 2), dtype=bool, order='F')
+    if entry is not None:
+        signal_block[:, 0] = _to_signal(entry)
+    if exit_ is not None:
+        signal_block[:, 1] = _to_signal(exit_)
+    return pd.DataFrame(signal_block, index=index, columns=['entry', 'exit'], copy=False)
+
+
+class _SourceBuilder:
+    """Accumulates the statements of a generated function and the objects it references."""
+    
+    def __init__(self):
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {}
+        # Canonical JSON of an AST node -> local variable holding its value
+        self.memo: Dict[str, str] = {}
+        self._bound: Dict[int, str] = {}
+    
+    def bind(self, value: Any) -> str:
+        """Make a Python object available to the generated code under a fresh name."""
+        if callable(value):
+            # Functions are shared, so bind each one only once
+            name = self._bound.get(id(value))
+            if name is None:
+                name = self._bound[id(value)] = f"_f{len(self._bound)}"
+                self.namespace[name] = value
+            return name
+        name = f"_c{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+    
+    def assign(self, expression: str) -> str:
+        """Emit `vN = expression` and return the variable name."""
+        name = f"v{len(self.lines)}"
+        self.lines.append(f"{name} = {expression}")
+        return name
+
+
 class CodeGenerator:
     """Generator that converts AST to Python evaluation functions."""
     
@@ -46,157 +166,179 @@ class CodeGenerator:
             "crosses_above": crosses_above,
             "crosses_below": crosses_below,
         }
+        
+        self.comparison_operators = {
+            ">": np.greater,
+            "<": np.less,
+            ">=": np.greater_equal,
+            "<=": np.less_equal,
+            "==": np.equal,
+            "!=": np.not_equal,
+        }
+        
+        # Each takes any number of conditions, so a chain such as
+        # a AND b AND c is combined in one call
+        self.boolean_operators = {
+            "AND": fused_and,
+            "OR": fused_or,
+        }
+        
+        # Node emitters keyed by the AST "type" field
+        self._dispatch = {
+            "series": self._emit_series,
+            "indicator": self._emit_indicator,
+            "function_call": self._emit_function_call,
+            "binary_op": self._emit_binary_op,
+            "boolean_op": self._emit_boolean_op,
+            "": self._emit_untyped,
+        }
     
     def generate(self, ast: Dict[str, Any]) -> Callable:
         """
         Generate a Python function from AST that evaluates entry/exit conditions.
         
+        The generated source is available as the function's ``source``
+        attribute. Identical subexpressions (e.g. the same sma() in entry and
+        exit) are emitted once and reused.
+        
+        The function also takes an optional ``cache`` dict. Indicator results
+        are stored in it and reused by any evaluator called with the same
+        dict, so several strategies run on one DataFrame compute each
+        indicator once. Use a separate cache per DataFrame.
+        
+        Passing ``use_precomputed=True`` also reads close-price indicators
+        from the columns calculate_indicators() adds (e.g. 'sma_20') instead
+        of recomputing them. It is off by default, since the columns are
+        trusted as is: only pass it for a DataFrame whose indicator columns
+        were computed from its current close prices.
+        
         Args:
             ast: AST dictionary with "entry" and/or "exit" keys
             
         Returns:
             Function that takes a DataFrame and returns signals DataFrame
-        """
-        def evaluate_strategy(df: pd.DataFrame) -> pd.DataFrame:
-            """
-            Evaluate strategy rules on a DataFrame.
-            
-            Args:
-                df: DataFrame with OHLCV columns (open, high, low, close, volume)
-                
-            Returns:
-                DataFrame with 'entry' and 'exit' boolean columns
-            """
-            signals = pd.DataFrame(index=df.index)
-            signals['entry'] = False
-            signals['exit'] = False
-            
-            # Evaluate entry conditions
-            if "entry" in ast and ast["entry"]:
-                entry_conditions = ast["entry"]
-                if not isinstance(entry_conditions, list):
-                    entry_conditions = [entry_conditions]
-                
-                entry_signals = None
-                for condition in entry_conditions:
-                    condition_result = self._evaluate_expression(condition, df)
-                    if entry_signals is None:
-                        entry_signals = condition_result
-                    else:
-                        # Combine with AND (default)
-                        entry_signals = entry_signals & condition_result
-                
-                signals['entry'] = entry_signals.fillna(False)
             
-            # Evaluate exit conditions
-            if "exit" in ast and ast["exit"]:
-                exit_conditions = ast["exit"]
-                if not isinstance(exit_conditions, list):
-                    exit_conditions = [exit_conditions]
-                
-                exit_signals = None
-                for condition in exit_conditions:
-                    condition_result = self._evaluate_expression(condition, df)
-                    if exit_signals is None:
-                        exit_signals = condition_result
-                    else:
-                        # Combine with AND (default)
-                        exit_signals = exit_signals & condition_result
-                
-                signals['exit'] = exit_signals.fillna(False)
-            
-            return signals
+        Raises:
+            ValueError: If the AST references unknown node types, indicators,
+                functions or operators
+        """
+        builder = _SourceBuilder()
+        entry = self._emit_conditions(ast.get("entry"), builder)
+        exit_ = self._emit_conditions(ast.get("exit"), builder)
         
+        source = "\n".join(
+            ["def evaluate_strategy(df, cache=None, use_precomputed=False):", "    index = df.index"]
+            + [f"    {line}" for line in builder.lines]
+            + [f"    return {builder.bind(_build_signals)}(index, {entry}, {exit_})", ""]
+        )
+        exec(compile(source, "<generated strategy>", "exec"), builder.namespace)
+        
+        evaluate_strategy = builder.namespace["evaluate_strategy"]
+        evaluate_strategy.__doc__ = (
+            "Evaluate strategy rules on a DataFrame with OHLCV columns "
+            "(open, high, low, close, volume) and return a DataFrame with "
+            "'entry' and 'exit' boolean columns. Indicator results are read "
+            "from and stored in the optional cache dict; use_precomputed reads "
+            "them from calculate_indicators() columns."
+        )
+        evaluate_strategy.source = source
         return evaluate_strategy
     
-    def _evaluate_expression(self, expr: Any, df: pd.DataFrame) -> pd.Series:
+    def _emit_conditions(self, conditions: Any, builder: _SourceBuilder) -> str:
+        """Emit an entry/exit section; its conditions are combined with AND."""
+        if not conditions:
+            return "None"
+        if not isinstance(conditions, list):
+            conditions = [conditions]
+        
+        operands = [self._emit(condition, builder) for condition in conditions]
+        if len(operands) == 1:
+            return operands[0]
+        # Combine with AND (default)
+        return builder.assign(f"{builder.bind(fused_and)}({', '.join(operands)})")
+    
+    def _emit(self, expr: Any, builder: _SourceBuilder) -> str:
         """
-        Evaluate an AST expression node.
+        Emit the statements that evaluate an AST expression node.
         
         Args:
             expr: AST node or value
-            df: DataFrame with OHLCV data
+            builder: Source being generated
             
         Returns:
-            Series with boolean or numeric values
+            Name that holds the node's value in the generated code: an array
+            with boolean or numeric values, or a scalar for numeric literals
         """
         if isinstance(expr, dict):
-            expr_type = expr.get("type", "")
-            
-            if expr_type == "series":
-                series_name = expr.get("value", "")
-                # Handle Token objects
-                if hasattr(series_name, 'value'):
-                    series_name = str(series_name.value)
-                elif not isinstance(series_name, str):
-                    series_name = str(series_name)
-                if series_name not in df.columns:
-                    raise ValueError(f"Series '{series_name}' not found in DataFrame")
-                return df[series_name]
-            
-            elif expr_type == "indicator":
-                return self._evaluate_indicator(expr, df)
-            
-            elif expr_type == "function_call":
-                # Ensure this is actually a function call node
-                if "name" not in expr:
-                    raise ValueError(f"Invalid function_call node: missing 'name' field. Node: {expr}")
-                return self._evaluate_function_call(expr, df)
-            
-            elif expr_type == "binary_op":
-                return self._evaluate_binary_op(expr, df)
-            
-            elif expr_type == "boolean_op":
-                return self._evaluate_boolean_op(expr, df)
-            
-            elif expr_type == "":
-                # Try to infer type from structure
-                if "name" in expr and "args" in expr:
-                    # Looks like a function call
-                    return self._evaluate_function_call(expr, df)
-                elif "value" in expr:
-                    # Might be a series
-                    return self._evaluate_expression({"type": "series", "value": expr.get("value")}, df)
-                else:
-                    raise ValueError(f"Expression node missing 'type' field: {expr}")
-            else:
-                raise ValueError(f"Unknown expression type: {expr_type}. Node: {expr}")
+            key = json.dumps(expr, sort_keys=True, default=str)
+            name = builder.memo.get(key)
+            if name is None:
+                handler = self._dispatch.get(expr.get("type", ""))
+                if handler is None:
+                    raise ValueError(f"Unknown expression type: {expr.get('type')}. Node: {expr}")
+                name = builder.memo[key] = handler(expr, builder)
+            return name
         
         elif isinstance(expr, (int, float)):
-            return pd.Series(expr, index=df.index)
+            # Constants stay scalars; NumPy broadcasts them against arrays
+            return builder.bind(expr)
         
         elif isinstance(expr, str):
-            # Try as series name
-            if expr in df.columns:
-                return df[expr]
-            # Otherwise treat as literal
             try:
-                return pd.Series(float(expr), index=df.index)
+                literal = float(expr)
             except ValueError:
-                raise ValueError(f"Cannot evaluate expression: {expr}")
+                literal = None
+            return builder.assign(
+                f"{builder.bind(_column_or_literal)}(df, {builder.bind(expr)}, {builder.bind(literal)})"
+            )
         
         else:
             raise ValueError(f"Unexpected expression type: {type(expr)}")
     
-    def _evaluate_indicator(self, node: Dict[str, Any], df: pd.DataFrame) -> pd.Series:
-        """Evaluate an indicator node."""
+    def _emit_series(self, node: Dict[str, Any], builder: _SourceBuilder) -> str:
+        """Emit a series node."""
+        series_name = node.get("value", "")
+        # Handle Token objects
+        if hasattr(series_name, 'value'):
+            series_name = str(series_name.value)
+        elif not isinstance(series_name, str):
+            series_name = str(series_name)
+        return builder.assign(f"{builder.bind(_column)}(df, {builder.bind(series_name)}).to_numpy()")
+    
+    def _emit_untyped(self, node: Dict[str, Any], builder: _SourceBuilder) -> str:
+        """Emit a node without a 'type' field by inferring it from its structure."""
+        if "name" in node and "args" in node:
+            # Looks like a function call
+            return self._emit_function_call(node, builder)
+        elif "value" in node:
+            # Might be a series
+            return self._emit({"type": "series", "value": node.get("value")}, builder)
+        else:
+            raise ValueError(f"Expression node missing 'type' field: {node}")
+    
+    def _emit_indicator(self, node: Dict[str, Any], builder: _SourceBuilder) -> str:
+        """Emit an indicator node."""
         name = node.get("name", "")
         series_name = node.get("series", "close")
         period = node.get("period", 20)
         
-        if series_name not in df.columns:
-            raise ValueError(f"Series '{series_name}' not found in DataFrame")
-        
-        series = df[series_name]
-        
         if name not in self.indicator_functions:
             raise ValueError(f"Unknown indicator: {name}")
         
-        func = self.indicator_functions[name]
-        return func(series, period)
+        func = builder.bind(self.indicator_functions[name])
+        key = builder.bind((name, series_name, period))
+        # calculate_indicators() names its close-price columns '<name>_<period>'
+        precomputed = builder.bind(f"{name}_{period}" if series_name == "close" else None)
+        return builder.assign(
+            f"{builder.bind(_indicator)}(df, cache, {func}, {builder.bind(series_name)}, "
+            f"{builder.bind(period)}, {key}, {precomputed}, use_precomputed)"
+        )
     
-    def _evaluate_function_call(self, node: Dict[str, Any], df: pd.DataFrame) -> pd.Series:
-        """Evaluate a function call node."""
+    def _emit_function_call(self, node: Dict[str, Any], builder: _SourceBuilder) -> str:
+        """Emit a function call node."""
+        # Ensure this is actually a function call node
+        if "name" not in node:
+            raise ValueError(f"Invalid function_call node: missing 'name' field. Node: {node}")
         name = node.get("name", "")
         # Handle Token objects
         if hasattr(name, 'value'):
@@ -210,81 +352,82 @@ class CodeGenerator:
             if len(args) < 1:
                 raise ValueError(f"Function '{name}' requires at least 1 argument")
             
-            series_node = args[0]
-            series = self._evaluate_expression(series_node, df)
+            func = builder.bind(self.time_functions[name])
+            series = f"{builder.bind(_as_series)}({self._emit(args[0], builder)}, index)"
             
-            if name == "yesterday":
-                return self.time_functions[name](series)
-            elif name == "last_week":
-                return self.time_functions[name](series)
-            elif name == "n_days_ago":
+            if name == "n_days_ago":
                 n = args[1] if len(args) > 1 else 1
-                return self.time_functions[name](series, n)
+                return builder.assign(f"{func}({series}, {builder.bind(n)}).to_numpy()")
+            return builder.assign(f"{func}({series}).to_numpy()")
         
         # Change functions
         elif name in self.change_functions:
             if len(args) < 1:
                 raise ValueError(f"Function '{name}' requires at least 1 argument")
             
-            series_node = args[0]
-            series = self._evaluate_expression(series_node, df)
+            func = builder.bind(self.change_functions[name])
+            series = f"{builder.bind(_as_series)}({self._emit(args[0], builder)}, index)"
             n = args[1] if len(args) > 1 else 1
             
-            return self.change_functions[name](series, n)
+            return builder.assign(f"{func}({series}, {builder.bind(n)}).to_numpy()")
         
         # Cross functions
         elif name in self.cross_functions:
             if len(args) < 2:
                 raise ValueError(f"Function '{name}' requires 2 arguments")
             
-            left_expr = self._evaluate_expression(args[0], df)
-            right_expr = self._evaluate_expression(args[1], df)
-            
-            return self.cross_functions[name](left_expr, right_expr)
+            left = self._emit(args[0], builder)
+            right = self._emit(args[1], builder)
+            return self._emit_cross(self.cross_functions[name], left, right, builder)
         
         else:
             raise ValueError(f"Unknown function: {name}")
     
-    def _evaluate_binary_op(self, node: Dict[str, Any], df: pd.DataFrame) -> pd.Series:
-        """Evaluate a binary operation node."""
+    def _emit_cross(self, func: Callable, left: str, right: str, builder: _SourceBuilder) -> str:
+        """Emit a crosses_above/crosses_below call on two emitted operands."""
+        as_series = builder.bind(_as_series)
+        return builder.assign(
+            f"{builder.bind(func)}({as_series}({left}, index), "
+            f"{builder.bind(_cross_operand)}({right}, index)).to_numpy()"
+        )
+    
+    def _emit_binary_op(self, node: Dict[str, Any], builder: _SourceBuilder) -> str:
+        """Emit a binary operation node."""
         operator = node.get("operator", ">")
-        left = self._evaluate_expression(node.get("left"), df)
-        right = self._evaluate_expression(node.get("right"), df)
+        left = self._emit(node.get("left"), builder)
+        right = self._emit(node.get("right"), builder)
         
         # Handle cross operators specially
-        if operator == "crosses_above":
-            return crosses_above(left, right)
-        elif operator == "crosses_below":
-            return crosses_below(left, right)
+        if operator in self.cross_functions:
+            return self._emit_cross(self.cross_functions[operator], left, right, builder)
         
         # Standard comparison operators
-        if operator == ">":
-            return left > right
-        elif operator == "<":
-            return left < right
-        elif operator == ">=":
-            return left >= right
-        elif operator == "<=":
-            return left <= right
-        elif operator == "==":
-            return left == right
-        elif operator == "!=":
-            return left != right
-        else:
+        if operator not in self.comparison_operators:
             raise ValueError(f"Unknown operator: {operator}")
+        compare = builder.bind(self.comparison_operators[operator])
+        
+        return builder.assign(f"{compare}({left}, {right})")
     
-    def _evaluate_boolean_op(self, node: Dict[str, Any], df: pd.DataFrame) -> pd.Series:
-        """Evaluate a boolean operation node."""
+    def _emit_boolean_op(self, node: Dict[str, Any], builder: _SourceBuilder) -> str:
+        """Emit a boolean operation node, flattening nested uses of the same operator."""
         operator = node.get("operator", "AND")
-        left = self._evaluate_expression(node.get("left"), df)
-        right = self._evaluate_expression(node.get("right"), df)
-        
-        if operator == "AND":
-            return left & right
-        elif operator == "OR":
-            return left | right
-        else:
+        if operator not in self.boolean_operators:
             raise ValueError(f"Unknown boolean operator: {operator}")
+        combine = builder.bind(self.boolean_operators[operator])
+        
+        # a AND b AND c parses as ((a AND b) AND c); combine all three in one
+        # fused call instead of materializing a AND b first
+        operands = []
+        pending = [node.get("right"), node.get("left")]
+        while pending:
+            child = pending.pop()
+            if (isinstance(child, dict) and child.get("type") == "boolean_op"
+                    and child.get("operator", "AND") == operator):
+                pending.extend([child.get("right"), child.get("left")])
+            else:
+                operands.append(self._emit(child, builder))
+        
+        return builder.assign(f"{combine}({', '.join(operands)})")
 
 
 def generate_code_from_ast(ast: Dict[str, Any]) -> Callable:
@@ -299,4 +442,3 @@ def generate_code_from_ast(ast: Dict[str, Any]) -> Callable:
     """
     generator = CodeGenerator()
     return generator.generate(ast)
-
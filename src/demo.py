@@ -115,9 +115,10 @@ def run_demo(nl_input: str, data_file: str = "data/sample_data.csv",
     print_section("Step 6: Execute Generated Code")
     try:
         signals = evaluator(df)
+        entry_count, exit_count = signals[['entry', 'exit']].to_numpy().sum(axis=0)
         print("\nGenerated signals:")
-        print(f"  Entry signals: {signals['entry'].sum()} days")
-        print(f"  Exit signals: {signals['exit'].sum()} days")
+        print(f"  Entry signals: {entry_count} days")
+        print(f"  Exit signals: {exit_count} days")
         print("\nSample signals (first 20 days):")
         print(signals.head(20))
     except Exception as e:
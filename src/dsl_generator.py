@@ -2,7 +2,7 @@
 DSL Generator - Converts structured JSON to DSL text format.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 
 
 class DSLGenerator:
@@ -54,14 +54,16 @@ class DSLGenerator:
             return ""
         
         if len(rules) == 1:
-            return self._generate_rule(rules[0])
+            return self._generate_rule(rules[0])[0]
         
-        # Combine multiple rules
+        # Combine multiple rules, parenthesising those that are themselves compound
         operator = " AND " if use_and else " OR "
-        rule_strings = [self._generate_rule(rule) for rule in rules]
-        return operator.join(f"({s})" if " AND " in s or " OR " in s else s for s in rule_strings)
+        return operator.join(
+            f"({text})" if is_compound else text
+            for text, is_compound in map(self._generate_rule, rules)
+        )
     
-    def _generate_rule(self, rule: Dict[str, Any]) -> str:
+    def _generate_rule(self, rule: Dict[str, Any]) -> Tuple[str, bool]:
         """
         Generate DSL for a single rule.
         
@@ -69,19 +71,29 @@ class DSLGenerator:
             rule: Rule dictionary with "left", "operator", "right" keys
             
         Returns:
-            DSL text for the rule
+            Tuple of (DSL text for the rule, whether the text contains a
+            top-level AND/OR and so needs parentheses inside a rule list)
         """
-        left = self._generate_expression(rule.get("left", ""))
+        left_expr = rule.get("left", "")
+        right_expr = rule.get("right", "")
+        left = self._generate_expression(left_expr)
         operator = rule.get("operator", ">")
-        right = self._generate_expression(rule.get("right", ""))
+        right = self._generate_expression(right_expr)
         
         # Handle special operators
         if operator == "crosses_above":
-            return f"crosses_above({left}, {right})"
+            return f"crosses_above({left}, {right})", False
         elif operator == "crosses_below":
-            return f"crosses_below({left}, {right})"
+            return f"crosses_below({left}, {right})", False
         else:
-            return f"{left} {operator} {right}"
+            # Only raw string operands can carry a boolean operator through
+            is_compound = self._is_compound(left_expr) or self._is_compound(right_expr)
+            return f"{left} {operator} {right}", is_compound
+    
+    @staticmethod
+    def _is_compound(expr: Any) -> bool:
+        """Whether a raw expression string contains a boolean operator."""
+        return isinstance(expr, str) and (" AND " in expr or " OR " in expr)
     
     def _generate_expression(self, expr: Any) -> str:
         """
@@ -107,7 +119,7 @@ class DSLGenerator:
                 return self._generate_ast_node(expr)
             else:
                 # Treat as a rule
-                return f"({self._generate_rule(expr)})"
+                return f"({self._generate_rule(expr)[0]})"
         else:
             return str(expr)
     
@@ -2,8 +2,11 @@
 DSL Parser - Parses DSL text into Abstract Syntax Tree (AST) using Lark.
 """
 
+import functools
+import os
+import sys
 from typing import Dict, List, Any, Union, Optional
-from lark import Lark, Transformer, Tree, Token
+from lark import Lark, Transformer, Tree, Token, v_args
 from lark.exceptions import LarkError
 
 
@@ -17,17 +20,17 @@ strategy: entry_section exit_section?
 entry_section: "ENTRY" ":" rule_list
 exit_section: "EXIT" ":" rule_list
 
-rule_list: rule (boolean_op rule)*
+rule_list: rule (BOOLEAN_OP rule)*
 rule: comparison | "(" rule_list ")"
 
 comparison: expression operator expression
 
-operator: ">" | "<" | ">=" | "<=" | "==" | "!=" | CROSSES_ABOVE | CROSSES_BELOW
+operator: COMPARISON_OP | CROSS_OP
 
-CROSSES_ABOVE: "crosses_above"
-CROSSES_BELOW: "crosses_below"
+COMPARISON_OP: ">=" | "<=" | "==" | "!=" | ">" | "<"
+CROSS_OP: /\\bcrosses_(?:above|below)\\b/
 
-boolean_op: "AND" | "OR"
+BOOLEAN_OP: "AND" | "OR"
 
 expression: series
           | indicator
@@ -37,33 +40,22 @@ expression: series
           | "(" expression ")"
 
 series: SERIES_NAME
-SERIES_NAME: "open" | "high" | "low" | "close" | "volume"
+SERIES_NAME: /\\b(?:open|high|low|close|volume)\\b/
 
 indicator: indicator_name "(" expression ("," number)? ")"
 
 indicator_name: INDICATOR_NAME_TOKEN
-INDICATOR_NAME_TOKEN: "sma" | "rsi" | "ema"
+INDICATOR_NAME_TOKEN: /\\b(?:sma|rsi|ema)\\b/
 
-function_call: time_function
+function_call: series_function
              | cross_function
-             | change_function
 
-time_function: yesterday_func
-             | last_week_func
-             | n_days_ago_func
+series_function: SERIES_FUNC "(" series ")"
+               | PERIOD_FUNC "(" series "," number ")"
+SERIES_FUNC: /\\b(?:yesterday|last_week)\\b/
+PERIOD_FUNC: /\\b(?:n_days_ago|percent_change|change)\\b/
 
-yesterday_func: "yesterday" "(" series ")"
-last_week_func: "last_week" "(" series ")"
-n_days_ago_func: "n_days_ago" "(" series "," number ")"
-
-cross_function: CROSSES_ABOVE "(" expression "," expression ")"
-              | CROSSES_BELOW "(" expression "," expression ")"
-
-change_function: change_func
-               | percent_change_func
-
-change_func: "change" "(" series "," number ")"
-percent_change_func: "percent_change" "(" series "," number ")"
+cross_function: CROSS_OP "(" expression "," expression ")"
 
 number: SIGNED_NUMBER
 percentage: SIGNED_NUMBER "%"
@@ -74,106 +66,131 @@ percentage: SIGNED_NUMBER "%"
 """
 
 
+# Shared AST strings. The values that come from the input (series, indicator
+# and cross names) map to these interned objects instead of a fresh str per
+# token, so large batches of ASTs share one copy of each name.
+_T_SERIES = sys.intern("series")
+_T_INDICATOR = sys.intern("indicator")
+_T_FUNCTION_CALL = sys.intern("function_call")
+_T_BINOP = sys.intern("binary_op")
+_T_BOOLOP = sys.intern("boolean_op")
+_SERIES_NAMES = {n: sys.intern(n) for n in ("open", "high", "low", "close", "volume")}
+_INDICATOR_NAMES = {n: sys.intern(n) for n in ("sma", "rsi", "ema")}
+_CROSS_OPS = {op: sys.intern(op) for op in ("crosses_above", "crosses_below")}
+_COMPARISON_OPS = {op: sys.intern(op) for op in (">", "<", ">=", "<=", "==", "!=")}
+_BOOLEAN_OPS = {op: sys.intern(op) for op in ("AND", "OR")}
+_FUNC_NAMES = {n: sys.intern(n) for n in ("yesterday", "last_week", "n_days_ago", "change", "percent_change")}
+
+
+def _series_value(node: Any) -> str:
+    """Series name of a series node; any other expression falls back to its string form."""
+    if node.__class__ is dict and node["type"] == _T_SERIES:
+        return node["value"]
+    return str(node)
+
+
+@v_args(inline=True)
 class DSLTransformer(Transformer):
-    """Transform Lark parse tree into AST structure."""
+    """
+    Transform Lark parse tree into AST structure.
+    
+    Rule callbacks receive their children as positional arguments, and the
+    terminals below are converted as they are shifted, so rule callbacks see
+    plain strings and numbers rather than Tokens.
+    """
+    
+    # Terminal callbacks
+    
+    def SERIES_NAME(self, token):
+        return _SERIES_NAMES[token]
+    
+    def INDICATOR_NAME_TOKEN(self, token):
+        return _INDICATOR_NAMES[token]
+    
+    def CROSS_OP(self, token):
+        return _CROSS_OPS[token]
+    
+    def COMPARISON_OP(self, token):
+        return _COMPARISON_OPS[token]
     
-    def start(self, items):
+    def BOOLEAN_OP(self, token):
+        return _BOOLEAN_OPS[token]
+    
+    def SERIES_FUNC(self, token):
+        return _FUNC_NAMES[token]
+    
+    def PERIOD_FUNC(self, token):
+        return _FUNC_NAMES[token]
+    
+    def SIGNED_NUMBER(self, token):
+        return float(token)
+    
+    # Rule callbacks
+    
+    def start(self, strategy):
         """Root node."""
-        result = {}
-        for item in items:
-            if isinstance(item, dict):
-                result.update(item)
-        return result
+        return strategy
     
-    def strategy(self, items):
-        """Strategy node."""
-        result = {}
-        for item in items:
-            if isinstance(item, dict):
-                result.update(item)
-        return result
+    def strategy(self, *sections):
+        """Strategy node: one or two section dicts."""
+        return {**sections[0], **sections[1]} if len(sections) > 1 else sections[0]
     
-    def entry_section(self, items):
+    def entry_section(self, rules):
         """Entry section."""
-        return {"entry": items[0]}
+        return {"entry": rules}
     
-    def exit_section(self, items):
+    def exit_section(self, rules):
         """Exit section."""
-        return {"exit": items[0]}
+        return {"exit": rules}
     
-    def rule_list(self, items):
+    def rule_list(self, *items):
         """Rule list - combine rules with boolean operators."""
         if len(items) == 1:
             return items[0]
         
-        # Build a tree of boolean operations
+        # Build a left-nested tree of boolean operations; the grammar
+        # guarantees items alternate rule, op, rule, ...
         result = items[0]
-        for i in range(1, len(items), 2):
-            if i + 1 < len(items):
-                op = items[i]
-                right = items[i + 1]
-                result = {
-                    "type": "boolean_op",
-                    "operator": op,
-                    "left": result,
-                    "right": right
-                }
+        pairs = iter(items[1:])
+        for op, right in zip(pairs, pairs):
+            result = {
+                "type": _T_BOOLOP,
+                "operator": op,
+                "left": result,
+                "right": right
+            }
         return result
     
-    def rule(self, items):
+    def rule(self, node):
         """Single rule."""
-        return items[0]
+        return node
     
-    def comparison(self, items):
+    def comparison(self, left, op, right):
         """Comparison operation."""
-        left, op, right = items
         return {
-            "type": "binary_op",
+            "type": _T_BINOP,
             "operator": op,
             "left": left,
             "right": right
         }
     
-    def operator(self, items):
+    def operator(self, op):
         """Operator token."""
-        if not items or len(items) == 0:
-            # This shouldn't happen, but handle gracefully
-            return ">"
-        return str(items[0])
-    
-    def boolean_op(self, items):
-        """Boolean operator."""
-        if not items or len(items) == 0:
-            return "AND"
-        return str(items[0]).upper()
-    
-    def expression(self, items):
+        return op
+    
+    def expression(self, node):
         """Expression."""
-        return items[0]
+        return node
     
-    def series(self, items):
+    def series(self, name):
         """Series reference."""
-        if not items or len(items) == 0:
-            raise ValueError("Series rule matched but no items found")
-        # Handle both token and string inputs - convert Token to string
-        item = items[0]
-        if hasattr(item, 'value'):  # Token object
-            value = str(item.value)
-        elif isinstance(item, str):
-            value = item
-        else:
-            value = str(item)
         return {
-            "type": "series",
-            "value": value
+            "type": _T_SERIES,
+            "value": name
         }
     
-    def indicator(self, items):
+    def indicator(self, name, expr_node, period=None):
         """Indicator call."""
-        name = str(items[0])
-        expr_node = items[1]
-        period = items[2] if len(items) > 2 else None
-        
         # Default periods
         if period is None:
             if name == "rsi":
@@ -183,188 +200,70 @@ class DSLTransformer(Transformer):
             elif name == "ema":
                 period = 20
         
-        # Extract series value from expression node
-        if isinstance(expr_node, dict):
-            if expr_node.get("type") == "series":
-                series_value = expr_node.get("value")
-            else:
-                series_value = str(expr_node)
-        else:
-            series_value = str(expr_node)
-        
         return {
-            "type": "indicator",
+            "type": _T_INDICATOR,
             "name": name,
-            "series": series_value,
+            "series": _series_value(expr_node),
             "period": period
         }
     
-    def indicator_name(self, items):
+    def indicator_name(self, name):
         """Indicator name."""
-        if not items or len(items) == 0:
-            raise ValueError("Indicator name rule matched but no items found")
-        return str(items[0])
+        return name
     
-    def function_call(self, items):
+    def function_call(self, node):
         """Function call."""
-        return items[0]
-    
-    def time_function(self, items):
-        """Time-based function - delegates to specific function."""
-        return items[0]
-    
-    def yesterday_func(self, items):
-        """Yesterday function."""
-        # Items: [series_node] (parentheses and function name are not in items)
-        series_node = items[0] if items else {"type": "series", "value": "close"}
-        if isinstance(series_node, dict):
-            series_value = series_node.get("value", "close")
-            # Handle Token objects
-            if hasattr(series_value, 'value'):
-                series_value = str(series_value.value)
-            elif not isinstance(series_value, str):
-                series_value = str(series_value)
-        else:
-            series_value = str(series_node)
-        return {
-            "type": "function_call",
-            "name": "yesterday",
-            "args": [{"type": "series", "value": series_value}]
-        }
+        return node
     
-    def last_week_func(self, items):
-        """Last week function."""
-        series_node = items[0] if items else {"type": "series", "value": "close"}
-        if isinstance(series_node, dict):
-            series_value = series_node.get("value", "close")
-            # Handle Token objects
-            if hasattr(series_value, 'value'):
-                series_value = str(series_value.value)
-            elif not isinstance(series_value, str):
-                series_value = str(series_value)
-        else:
-            series_value = str(series_node)
+    def series_function(self, name, series_node, *numbers):
+        """Time and change functions: yesterday, last_week, n_days_ago, change, percent_change."""
+        # The series node built by series() is reused as the first argument
         return {
-            "type": "function_call",
-            "name": "last_week",
-            "args": [{"type": "series", "value": series_value}]
-        }
-    
-    def n_days_ago_func(self, items):
-        """N days ago function."""
-        # Items: [series_node, number] or [series_node, ',', number]
-        series_node = items[0] if items else {"type": "series", "value": "close"}
-        if isinstance(series_node, dict):
-            series_value = series_node.get("value", "close")
-            # Handle Token objects
-            if hasattr(series_value, 'value'):
-                series_value = str(series_value.value)
-            elif not isinstance(series_value, str):
-                series_value = str(series_value)
-        else:
-            series_value = str(series_node)
-        
-        # Find the number (skip commas)
-        n_value = 1
-        for item in items[1:]:
-            if isinstance(item, (int, float)):
-                n_value = item
-                break
-        
-        return {
-            "type": "function_call",
-            "name": "n_days_ago",
-            "args": [
-                {"type": "series", "value": series_value},
-                n_value
-            ]
+            "type": _T_FUNCTION_CALL,
+            "name": name,
+            "args": [series_node, *numbers]
         }
     
-    def cross_function(self, items):
+    def cross_function(self, func_name, left_expr, right_expr):
         """Cross function."""
-        func_name = str(items[0])
-        left_expr = items[1]
-        right_expr = items[2]
-        
         return {
-            "type": "function_call",
+            "type": _T_FUNCTION_CALL,
             "name": func_name,
             "args": [left_expr, right_expr]
         }
     
-    def change_function(self, items):
-        """Change function - delegates to specific function."""
-        return items[0]
-    
-    def change_func(self, items):
-        """Change function."""
-        # Items: [series_node, number] or [series_node, ',', number]
-        series_node = items[0] if items else {"type": "series", "value": "close"}
-        if isinstance(series_node, dict):
-            series_value = series_node.get("value", "close")
-            # Handle Token objects
-            if hasattr(series_value, 'value'):
-                series_value = str(series_value.value)
-            elif not isinstance(series_value, str):
-                series_value = str(series_value)
-        else:
-            series_value = str(series_node)
-        
-        # Find the number (skip commas)
-        n_value = 1
-        for item in items[1:]:
-            if isinstance(item, (int, float)):
-                n_value = item
-                break
-        
-        return {
-            "type": "function_call",
-            "name": "change",
-            "args": [
-                {"type": "series", "value": series_value},
-                n_value
-            ]
-        }
-    
-    def percent_change_func(self, items):
-        """Percent change function."""
-        # Items: [series_node, number] or [series_node, ',', number]
-        series_node = items[0] if items else {"type": "series", "value": "close"}
-        if isinstance(series_node, dict):
-            series_value = series_node.get("value", "close")
-            # Handle Token objects
-            if hasattr(series_value, 'value'):
-                series_value = str(series_value.value)
-            elif not isinstance(series_value, str):
-                series_value = str(series_value)
-        else:
-            series_value = str(series_node)
-        
-        # Find the number (skip commas)
-        n_value = 1
-        for item in items[1:]:
-            if isinstance(item, (int, float)):
-                n_value = item
-                break
-        
-        return {
-            "type": "function_call",
-            "name": "percent_change",
-            "args": [
-                {"type": "series", "value": series_value},
-                n_value
-            ]
-        }
-    
-    def number(self, items):
+    def number(self, value):
         """Number literal."""
-        value = float(items[0])
         # Return as int if it's a whole number
         return int(value) if value.is_integer() else value
     
-    def percentage(self, items):
+    def percentage(self, value):
         """Percentage literal."""
-        return float(items[0])
+        return value
+
+
+# On-disk cache of the LALR tables. Lark keys it on a hash of the grammar and
+# options, rebuilds it when the grammar changes, and falls back to building
+# in memory if the file cannot be written.
+GRAMMAR_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dsl_grammar.cache")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_parser() -> Lark:
+    """Build the LALR parser once; the grammar and transformer are stateless, so it is shared."""
+    return Lark(DSL_GRAMMAR, start='start', parser='lalr', lexer='contextual', transformer=DSLTransformer(),
+                maybe_placeholders=False, keep_all_tokens=False, cache=GRAMMAR_CACHE_FILE)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_validator() -> Lark:
+    """
+    Build the recognizer used by DSLParser.validate: the same grammar with no
+    transformer, so no AST is built. Lark leaves the transformer out of the
+    cache key, so this shares the parser's on-disk table cache.
+    """
+    return Lark(DSL_GRAMMAR, start='start', parser='lalr', lexer='contextual',
+                maybe_placeholders=False, keep_all_tokens=False, cache=GRAMMAR_CACHE_FILE)
 
 
 class DSLParser:
@@ -372,7 +271,7 @@ class DSLParser:
     
     def __init__(self):
         """Initialize the parser."""
-        self.parser = Lark(DSL_GRAMMAR, start='start', parser='lalr', transformer=DSLTransformer())
+        self.parser = _get_parser()
     
     def parse(self, dsl_text: str) -> Dict[str, Any]:
         """
@@ -419,22 +318,47 @@ class DSLParser:
             True if valid, False otherwise
         """
         try:
-            self.parse(dsl_text)
+            _get_validator().parse(dsl_text.strip())
             return True
-        except ValueError:
+        except LarkError:
             return False
 
 
+# Inputs longer than this are parsed directly instead of being kept in the AST cache
+AST_CACHE_MAX_TEXT_LENGTH = 10000
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_cached(dsl_text: str) -> Dict[str, Any]:
+    """Parse already-stripped DSL text; the result is shared, so only hand out copies."""
+    return DSLParser().parse(dsl_text)
+
+
+def _copy_ast(node: Any) -> Any:
+    """Copy the dict/list structure of an AST; leaf values are immutable and shared."""
+    if isinstance(node, dict):
+        return {key: _copy_ast(value) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_copy_ast(item) for item in node]
+    return node
+
+
 def parse_dsl_to_ast(dsl_text: str) -> Dict[str, Any]:
     """
     Convenience function to parse DSL to AST.
     
+    Results are memoized by the stripped DSL text, so validating, re-running
+    or sweeping the same strategy only parses it once. Each call returns a
+    fresh copy that the caller is free to modify.
+    
     Args:
         dsl_text: DSL text string
         
     Returns:
         AST dictionary
     """
-    parser = DSLParser()
-    return parser.parse(dsl_text)
+    dsl_text = dsl_text.strip()
+    if len(dsl_text) > AST_CACHE_MAX_TEXT_LENGTH:
+        return DSLParser().parse(dsl_text)
+    return _copy_ast(_parse_cached(dsl_text))
 
@@ -2,15 +2,39 @@
 Generate sample OHLCV data for testing and demonstration.
 """
 
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from typing import Optional
+
+from src._jit import njit
+
+
+@njit(cache=True, fastmath=True)
+def _compound(initial_price, daily_returns):
+    """Compound daily returns into a price path; the first day closes at initial_price."""
+    out = np.empty_like(daily_returns)
+    if len(out) == 0:
+        return out
+    out[0] = initial_price
+    for i in range(1, len(daily_returns)):
+        out[i] = out[i - 1] * (1.0 + daily_returns[i])
+    return out
 
 
 def generate_sample_data(start_date: str = "2023-01-01", 
                         end_date: str = "2023-12-31",
                         initial_price: float = 100.0,
-                        output_file: str = "data/sample_data.csv") -> pd.DataFrame:
+                        output_file: str = "data/sample_data.csv",
+                        return_df: bool = True) -> Optional[pd.DataFrame]:
     """
     Generate synthetic OHLCV data with realistic price movements.
     
@@ -19,72 +43,83 @@ def generate_sample_data(start_date: str = "2023-01-01",
         end_date: End date (YYYY-MM-DD)
         initial_price: Starting price
         output_file: Output CSV file path
+        return_df: Build and return the DataFrame (default: True). When False
+            the CSV is written straight from the arrays and None is returned.
         
     Returns:
-        DataFrame with OHLCV data
+        DataFrame with OHLCV data, or None if return_df is False. Only the
+        CSV is rounded to cents: the returned prices are float32 at full
+        precision and are NOT rounded, so they differ from the CSV values
+        (and from versions that returned cent-rounded float64 prices).
     """
     # Create date range (trading days only - exclude weekends)
     date_range = pd.bdate_range(start=start_date, end=end_date)
     n_days = len(date_range)
     
     # Generate price movements using random walk with trend
-    np.random.seed(42)  # For reproducibility
-    
-    # Daily returns (normal distribution with slight upward bias)
-    daily_returns = np.random.normal(0.0005, 0.02, n_days)  # ~0.05% daily return, 2% volatility
+    rng = np.random.default_rng(42)  # For reproducibility
     
     # Add some trend and volatility clusters
     trend = np.linspace(0, 0.001, n_days)  # Gradual trend increase
-    volatility_cluster = np.random.choice([0.015, 0.025], size=n_days)  # Varying volatility
+    volatility_cluster = rng.choice([0.015, 0.025], size=n_days)  # Varying volatility
+    
+    # Daily returns: ~0.05% mean, 2% volatility, rescaled by the cluster
+    daily_returns = (0.0005 + 0.02 * rng.standard_normal(n_days)) * (volatility_cluster / 0.02) + trend
     
-    # Adjust returns
-    daily_returns = daily_returns * (volatility_cluster / 0.02) + trend
+    # Uniform draws for the daily range, opening gap and volume noise, in one call
+    daily_range_u, gap_u, volume_u = rng.random((3, n_days))
     
     # Generate close prices
-    close_prices = [initial_price]
-    for ret in daily_returns[1:]:
-        close_prices.append(close_prices[-1] * (1 + ret))
+    close_arr = _compound(float(initial_price), daily_returns)
     
-    # Generate OHLC from close prices
-    data = []
-    for i, (date, close) in enumerate(zip(date_range, close_prices)):
-        # High/Low range around close (typically 1-3% range)
-        daily_range_pct = np.random.uniform(0.01, 0.03)
-        
-        high = close * (1 + daily_range_pct / 2)
-        low = close * (1 - daily_range_pct / 2)
-        
-        # Open is typically close to previous close with some gap
-        if i == 0:
-            open_price = close * np.random.uniform(0.99, 1.01)
-        else:
-            gap = np.random.uniform(-0.005, 0.005)
-            open_price = close_prices[i-1] * (1 + gap)
-            # Ensure open is within high/low
-            open_price = max(low, min(high, open_price))
-        
-        # Volume (base volume with some randomness and correlation to price movement)
-        base_volume = 1000000
-        volume_multiplier = 1 + abs(daily_returns[i]) * 10  # Higher volume on big moves
-        volume = int(base_volume * volume_multiplier * np.random.uniform(0.7, 1.3))
-        
-        data.append({
-            'date': date,
-            'open': round(open_price, 2),
-            'high': round(high, 2),
-            'low': round(low, 2),
-            'close': round(close, 2),
-            'volume': volume
-        })
+    # High/Low range around close (typically 1-3% range)
+    daily_range_pct = 0.01 + 0.02 * daily_range_u
+    high_arr = close_arr * (1 + daily_range_pct / 2)
+    low_arr = close_arr * (1 - daily_range_pct / 2)
+    
+    # Open is typically close to previous close with some gap, kept within
+    # high/low; the first day has no previous close and opens within 1% of its close
+    gaps = -0.005 + 0.01 * gap_u
+    open_arr = np.empty(n_days)
+    open_arr[:1] = close_arr[:1] * (1 + 2 * gaps[:1])
+    open_arr[1:] = np.clip(close_arr[:-1] * (1 + gaps[1:]), low_arr[1:], high_arr[1:])
+    
+    # Volume (base volume with some randomness and correlation to price movement)
+    base_volume = 1000000
+    volume_multiplier = 1 + np.abs(daily_returns) * 10  # Higher volume on big moves
+    volume_arr = (base_volume * volume_multiplier * (0.7 + 0.6 * volume_u)).astype(np.int32)
+    
+    if not return_df:
+        # Only the CSV is wanted: write it from the column arrays directly.
+        # The prices are still float64 here, so the cents match the to_csv path
+        rows = np.rec.fromarrays(
+            [date_range.strftime('%Y-%m-%d').to_numpy(dtype=str),
+             open_arr, high_arr, low_arr, close_arr, volume_arr],
+            names='date,open,high,low,close,volume'
+        )
+        np.savetxt(output_file, rows, fmt=['%s', '%.2f', '%.2f', '%.2f', '%.2f', '%d'],
+                   delimiter=',', header=','.join(rows.dtype.names), comments='')
+        print(f"Generated {n_days} days of sample data and saved to {output_file}")
+        return None
     
-    df = pd.DataFrame(data)
-    df.set_index('date', inplace=True)
+    # The typed column arrays become the frame's columns as they are
+    # (copy=False skips consolidating them into a fresh 2-D block)
+    df = pd.DataFrame({
+        'open': open_arr,
+        'high': high_arr,
+        'low': low_arr,
+        'close': close_arr,
+        'volume': volume_arr
+    }, index=pd.Index(date_range, name='date'), copy=False)
     
-    # Save to CSV
-    df.to_csv(output_file)
+    # Save to CSV, formatting the float64 prices to cents
+    df.to_csv(output_file, float_format='%.2f', chunksize=65536)
     print(f"Generated {len(df)} days of sample data and saved to {output_file}")
     
-    return df
+    # The returned prices are stored as float32, which halves the bytes the
+    # indicators scan; this happens only after the CSV is written, so the
+    # file keeps the float64 values
+    return df.astype({col: np.float32 for col in ('open', 'high', 'low', 'close')})
 
 
 if __name__ == "__main__":
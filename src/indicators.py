@@ -4,56 +4,188 @@ Technical indicators and helper functions for time-series analysis.
 
 import pandas as pd
 import numpy as np
-from typing import Union
+from typing import Any, Optional, Tuple, Union
 
+from src._indicator_kernels import ema_kernel as _ema_kernel
 
-def sma(series: pd.Series, period: int) -> pd.Series:
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+# Bottleneck's moving-window mean, used by _rolling_mean when installed
+_move_mean = bn.move_mean if bn is not None else None
+
+
+def _float_values(series: pd.Series, dtype: Optional[Any] = None) -> np.ndarray:
+    """
+    Raw values of a series in the precision the indicators compute in.
+    
+    Args:
+        series: Input series
+        dtype: np.float32 or np.float64; by default float32 series stay
+            float32 and everything else is read as float64
+        
+    Returns:
+        1-D float array, without a copy when series already has that dtype
+    """
+    if dtype is None:
+        dtype = np.float32 if series.dtype == np.float32 else np.float64
+    elif np.dtype(dtype) not in (np.float32, np.float64):
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+    return series.to_numpy(dtype=dtype, copy=False)
+
+
+def _rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    Trailing mean over up to `period` values, in O(n) via prefix sums.
+    
+    Matches ``rolling(window=period, min_periods=1).mean()``: NaNs are
+    skipped, the first period-1 windows average what is available, and a
+    window with no valid values is NaN. Uses ``bottleneck.move_mean`` when
+    bottleneck is installed. Sums are accumulated in float64 whatever the
+    input precision.
+    
+    Args:
+        values: 1-D float32 or float64 array
+        period: Window length (positive integer)
+        
+    Returns:
+        float64 array of window means
+    """
+    if period < 1 or int(period) != period:
+        raise ValueError(f"period must be a positive integer, got {period}")
+    period = int(period)
+    if _move_mean is not None and len(values) > 0:
+        # bottleneck rejects windows longer than the input; with min_count=1
+        # a window of len(values) gives the same means
+        return _move_mean(values.astype(np.float64, copy=False), min(period, len(values)), min_count=1)
+    
+    valid = ~np.isnan(values)
+    totals = np.zeros(len(values) + 1)
+    counts = np.zeros(len(values) + 1)
+    np.cumsum(np.where(valid, values, 0.0), dtype=np.float64, out=totals[1:])
+    np.cumsum(valid, out=counts[1:])
+    
+    # Window i covers (i + 1 - period, i]; the head windows start at 0
+    window_totals = np.concatenate([totals[1:period], totals[period:] - totals[:-period]])
+    window_counts = np.concatenate([counts[1:period], counts[period:] - counts[:-period]])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, window_totals / window_counts, np.nan)
+
+
+def sma(series: pd.Series, period: int, dtype: Optional[Any] = None) -> pd.Series:
     """
     Calculate Simple Moving Average.
     
     Args:
         series: Price series (e.g., close prices)
         period: Number of periods for moving average
+        dtype: Result precision, np.float32 or np.float64 (default: float32
+            for float32 input, else float64)
         
     Returns:
         Series with SMA values
     """
-    return series.rolling(window=period, min_periods=1).mean()
+    values = _float_values(series, dtype)
+    out = _rolling_mean(values, period).astype(values.dtype, copy=False)
+    return pd.Series(out, index=series.index, name=series.name)
 
 
-def ema(series: pd.Series, period: int) -> pd.Series:
+def ema(series: pd.Series, period: int, dtype: Optional[Any] = None) -> pd.Series:
     """
     Calculate Exponential Moving Average.
     
     Args:
         series: Price series
         period: Number of periods for EMA
+        dtype: Result precision, np.float32 or np.float64 (default: float32
+            for float32 input, else float64)
         
     Returns:
         Series with EMA values
     """
-    return series.ewm(span=period, adjust=False).mean()
+    if period < 1:
+        raise ValueError(f"period must be >= 1, got {period}")
+    values = _float_values(series, dtype)
+    out = _ema_kernel(values, 2.0 / (period + 1)).astype(values.dtype, copy=False)
+    return pd.Series(out, index=series.index, name=series.name)
 
 
-def rsi(series: pd.Series, period: int = 14) -> pd.Series:
+def rsi(series: pd.Series, period: int = 14, dtype: Optional[Any] = None) -> pd.Series:
     """
     Calculate Relative Strength Index (RSI).
     
     Args:
         series: Price series (typically close prices)
         period: Number of periods (default: 14)
+        dtype: Result precision, np.float32 or np.float64 (default: float32
+            for float32 input, else float64)
         
     Returns:
         Series with RSI values (0-100)
     """
-    delta = series.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period, min_periods=1).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period, min_periods=1).mean()
+    values = _float_values(series, dtype)
+    delta = np.diff(values, prepend=values[:1])
+    
+    # Gains and losses per bar; undefined deltas (NaN) count as no move
+    gain = _rolling_mean(np.where(delta > 0, delta, 0.0), period)
+    loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), period)
     
-    rs = gain / loss
-    rsi_values = 100 - (100 / (1 + rs))
+    # No losses gives rs = inf and RSI 100; a flat window gives NaN. The
+    # averages are float64, so the division is too, whatever the input dtype.
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi_values = 100 - (100 / (1 + gain / loss))
     
-    return rsi_values.fillna(50)  # Fill NaN with neutral RSI value
+    rsi_values = rsi_values.astype(values.dtype, copy=False)
+    
+    # Fill NaN with neutral RSI value, in place (infinities are left as they are)
+    np.nan_to_num(rsi_values, copy=False, nan=50.0, posinf=np.inf, neginf=-np.inf)
+    return pd.Series(rsi_values, index=series.index, name=series.name)
+
+
+def _lag_slices(length: int, n: int) -> Tuple[slice, slice]:
+    """
+    Slices pairing each bar with the bar n bars earlier (later if n is negative).
+    
+    Args:
+        length: Array length
+        n: Bars to look back
+        
+    Returns:
+        (current, previous) slices of equal length, empty if abs(n) >= length
+    """
+    if int(n) != n:
+        raise ValueError(f"n must be an integer, got {n}")
+    n = int(n)
+    if abs(n) >= length:
+        return slice(0, 0), slice(0, 0)
+    if n >= 0:
+        return slice(n, length), slice(0, length - n)
+    return slice(0, length + n), slice(-n, length)
+
+
+def _shift(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Shift an array by n bars as float64, padding with NaN (like Series.shift).
+    
+    Args:
+        values: 1-D array
+        n: Bars to shift forward (backward if negative)
+        
+    Returns:
+        float64 array where out[i] = values[i - n]
+    """
+    current, previous = _lag_slices(len(values), n)
+    out = np.full(len(values), np.nan)
+    out[current] = values[previous]
+    return out
+
+
+def _lagged(series: pd.Series, n: int) -> pd.Series:
+    """Series shifted by n bars, computed on the raw array."""
+    values = series.to_numpy(dtype=np.float64)
+    return pd.Series(_shift(values, n), index=series.index, name=series.name)
 
 
 def yesterday(series: pd.Series) -> pd.Series:
@@ -66,7 +198,7 @@ def yesterday(series: pd.Series) -> pd.Series:
     Returns:
         Series with yesterday's values
     """
-    return series.shift(1)
+    return _lagged(series, 1)
 
 
 def last_week(series: pd.Series) -> pd.Series:
@@ -79,7 +211,7 @@ def last_week(series: pd.Series) -> pd.Series:
     Returns:
         Series with values from last week
     """
-    return series.shift(7)
+    return _lagged(series, 7)
 
 
 def n_days_ago(series: pd.Series, n: int) -> pd.Series:
@@ -93,35 +225,67 @@ def n_days_ago(series: pd.Series, n: int) -> pd.Series:
     Returns:
         Series with values from n days ago
     """
-    return series.shift(n)
+    return _lagged(series, n)
 
 
-def change(series: pd.Series, n: int = 1) -> pd.Series:
+def change(series: pd.Series, n: int = 1, dtype: Optional[Any] = None) -> pd.Series:
     """
     Calculate absolute change over n periods.
     
     Args:
         series: Price series
         n: Number of periods
+        dtype: Result precision, np.float32 or np.float64 (default: float32
+            for float32 input, else float64)
         
     Returns:
         Series with absolute changes
     """
-    return series - series.shift(n)
+    values = _float_values(series, dtype)
+    current, previous = _lag_slices(len(values), n)
+    out = np.full(len(values), np.nan, dtype=values.dtype)
+    # Subtract the lagged view in place; no shifted copy is materialized
+    np.subtract(values[current], values[previous], out=out[current])
+    return pd.Series(out, index=series.index, name=series.name)
 
 
-def percent_change(series: pd.Series, n: int = 1) -> pd.Series:
+def percent_change(series: pd.Series, n: int = 1, dtype: Optional[Any] = None) -> pd.Series:
     """
     Calculate percentage change over n periods.
     
     Args:
         series: Price series
         n: Number of periods
+        dtype: Result precision, np.float32 or np.float64 (default: float32
+            for float32 input, else float64)
         
     Returns:
         Series with percentage changes
     """
-    return ((series - series.shift(n)) / series.shift(n)) * 100
+    values = _float_values(series, dtype)
+    current, previous = _lag_slices(len(values), n)
+    out = np.full(len(values), np.nan, dtype=values.dtype)
+    dest = out[current]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        np.subtract(values[current], values[previous], out=dest)
+        np.divide(dest, values[previous], out=dest)
+        np.multiply(dest, 100, out=dest)
+    return pd.Series(out, index=series.index, name=series.name)
+
+
+def _cross_operands(series1: pd.Series, series2: Union[pd.Series, float]):
+    """
+    Raw operands for a cross test: series1's array and series2 at each bar and
+    the bar before. A constant series2 is returned as is for both, so it is
+    compared directly instead of being broadcast to a full-length array.
+    """
+    a = series1.to_numpy()
+    if np.ndim(series2) == 0:
+        return a, series2, series2
+    if not series2.index.equals(series1.index):
+        raise ValueError("Can only compare identically-labeled Series objects")
+    b = series2.to_numpy()
+    return a, b[1:], b[:-1]
 
 
 def crosses_above(series1: pd.Series, series2: Union[pd.Series, float]) -> pd.Series:
@@ -139,13 +303,12 @@ def crosses_above(series1: pd.Series, series2: Union[pd.Series, float]) -> pd.Se
     Returns:
         Boolean series indicating crossover points
     """
-    if isinstance(series2, (int, float)):
-        series2 = pd.Series(series2, index=series1.index)
-    
-    current_above = series1 > series2
-    prev_below = series1.shift(1) <= series2.shift(1)
-    
-    return current_above & prev_below
+    a, current, previous = _cross_operands(series1, series2)
+    out = np.zeros(len(a), dtype=bool)
+    # Today's and yesterday's comparisons read offset slices of the same
+    # arrays, so no shifted copies are made
+    out[1:] = (a[1:] > current) & (a[:-1] <= previous)
+    return pd.Series(out, index=series1.index)
 
 
 def crosses_below(series1: pd.Series, series2: Union[pd.Series, float]) -> pd.Series:
@@ -163,38 +326,114 @@ def crosses_below(series1: pd.Series, series2: Union[pd.Series, float]) -> pd.Se
     Returns:
         Boolean series indicating crossover points
     """
-    if isinstance(series2, (int, float)):
-        series2 = pd.Series(series2, index=series1.index)
+    a, current, previous = _cross_operands(series1, series2)
+    out = np.zeros(len(a), dtype=bool)
+    out[1:] = (a[1:] < current) & (a[:-1] >= previous)
+    return pd.Series(out, index=series1.index)
+
+
+def _fused(ufunc: np.ufunc, conditions) -> np.ndarray:
+    """Combine conditions left to right with ufunc, reusing one output array."""
+    out = np.asarray(ufunc(conditions[0], conditions[1]))
+    for condition in conditions[2:]:
+        # A scalar result (e.g. from two constant comparisons) is not a
+        # writable buffer of the right shape, so combine it out of place
+        if (out.ndim > 0 and out.flags.writeable
+                and out.shape == np.broadcast_shapes(out.shape, np.shape(condition))):
+            ufunc(out, condition, out=out)
+        else:
+            out = np.asarray(ufunc(out, condition))
+    return out
+
+
+def fused_and(*conditions) -> np.ndarray:
+    """
+    Logical AND of several boolean conditions in one output buffer.
+    
+    Equivalent to chaining np.logical_and, but a chain of N conditions
+    allocates one result array instead of N - 1 intermediates.
+    
+    Args:
+        *conditions: Two or more boolean arrays (or scalars)
+        
+    Returns:
+        Boolean array that is True where every condition is True
+    """
+    return _fused(np.logical_and, conditions)
+
+
+def fused_or(*conditions) -> np.ndarray:
+    """
+    Logical OR of several boolean conditions in one output buffer.
     
-    current_below = series1 < series2
-    prev_above = series1.shift(1) >= series2.shift(1)
+    Args:
+        *conditions: Two or more boolean arrays (or scalars)
+        
+    Returns:
+        Boolean array that is True where any condition is True
+    """
+    return _fused(np.logical_or, conditions)
+
+
+def and_mask_lazy(predicates, n: int) -> np.ndarray:
+    """
+    Logical AND of predicates, evaluating each only where the previous ones held.
+    
+    Each predicate is called with the bar indices that are still candidates
+    and returns one boolean per index, so later (more expensive) predicates
+    only look at the bars the earlier ones let through. Put the cheapest and
+    most selective predicate first; evaluation stops once no bar is left.
     
-    return current_below & prev_above
+    Args:
+        predicates: Callables mapping an int index array to a boolean array
+            of the same length, e.g. ``lambda idx: close[idx] > ema_20[idx]``
+        n: Number of bars
+        
+    Returns:
+        Boolean array of length n that is True where every predicate is True
+    """
+    candidates = np.arange(n)
+    for predicate in predicates:
+        if len(candidates) == 0:
+            break
+        candidates = candidates[np.asarray(predicate(candidates), dtype=bool)]
+    
+    out = np.zeros(n, dtype=bool)
+    out[candidates] = True
+    return out
 
 
-def calculate_indicators(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_indicators(df: pd.DataFrame, copy: bool = False,
+                         dtype: Optional[Any] = None) -> pd.DataFrame:
     """
     Pre-calculate common indicators for a DataFrame.
     This is optional but can improve performance.
     
+    By default the indicator columns are added to df in place and df itself
+    is returned, so the OHLCV data is not duplicated.
+    
     Args:
         df: DataFrame with OHLCV columns
+        copy: Add the columns to a copy of df and leave df unchanged
+            (default: False)
+        dtype: Precision of the indicator columns, np.float32 or np.float64
+            (default: follows the close column, see sma())
         
     Returns:
         DataFrame with additional indicator columns
     """
-    result = df.copy()
+    result = df.copy() if copy else df
+    close = result['close']
     
     # Common SMA periods
     for period in [20, 50, 200]:
-        result[f'sma_{period}'] = sma(result['close'], period)
+        result[f'sma_{period}'] = sma(close, period, dtype)
     
     # Common RSI periods
-    result['rsi_14'] = rsi(result['close'], 14)
+    result['rsi_14'] = rsi(close, 14, dtype)
     
     # Common EMA periods
     for period in [20, 50]:
-        result[f'ema_{period}'] = ema(result['close'], period)
+        result[f'ema_{period}'] = ema(close, period, dtype)
     
     return result
-
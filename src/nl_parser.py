@@ -2,8 +2,12 @@
 Natural Language Parser - Converts natural language trading rules to structured JSON.
 """
 
+import dbm
+import hashlib
 import json
 import os
+import re
+import shelve
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 
@@ -11,18 +15,77 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+# Parsed LLM responses are cached here across runs (set NL_PARSER_CACHE_DIR to
+# move it, or pass cache_dir=None to NLParser to turn caching off)
+DEFAULT_CACHE_DIR = os.getenv(
+    "NL_PARSER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rootally_nl")
+)
+
+# Patterns used by NLParser._regex_fallback, compiled once at import
+_RE_PERIOD = re.compile(r'(\d+)[-\s]*day')
+_RE_RSI_PERIOD = re.compile(r'rsi[^\d]*(\d+)')
+_RE_LESS = re.compile(r'(?:below|under|less than|<\s*)(\d+)')
+
+# System prompt shared by every provider and call
+_SYSTEM_PROMPT = """You are a trading strategy parser that converts natural language trading rules into structured JSON format.
+
+Convert the user's natural language trading instructions into a JSON object with the following structure:
+
+{
+  "entry": [
+    {
+      "left": "close",
+      "operator": ">",
+      "right": "sma(close,20)"
+    }
+  ],
+  "exit": [
+    {
+      "left": "rsi(close,14)",
+      "operator": "<",
+      "right": 30
+    }
+  ]
+}
+
+Rules:
+- "entry" and "exit" are arrays of condition objects
+- Each condition has "left", "operator", and "right" fields
+- Operators: ">", "<", ">=", "<=", "==", "!="
+- Series: "open", "high", "low", "close", "volume"
+- Indicators: "sma(series,period)", "rsi(series,period)", "ema(series,period)"
+- Time functions: "yesterday(series)", "last_week(series)", "n_days_ago(series,n)"
+- Cross functions: "crosses_above(series1,series2)", "crosses_below(series1,series2)"
+- Change functions: "change(series,n)", "percent_change(series,n)"
+- Numbers can be integers or floats
+- Percentages should be converted to numbers (e.g., "30 percent" -> 30)
+- Boolean logic: Multiple conditions in entry/exit arrays are combined with AND by default
+- For OR logic, use separate condition objects and mark them appropriately
+
+Examples:
+- "Buy when close is above 20-day moving average" -> {"left": "close", "operator": ">", "right": "sma(close,20)"}
+- "Exit when RSI(14) is below 30" -> {"left": "rsi(close,14)", "operator": "<", "right": 30}
+- "Enter when price crosses above yesterday's high" -> {"left": "close", "operator": "crosses_above", "right": "yesterday(high)"}
+- "Volume increases by more than 30 percent" -> {"left": "volume", "operator": ">", "right": "percent_change(volume,7) + 30"}
+
+Always return valid JSON only, no additional text."""
+
+
 class NLParser:
     """Parser that converts natural language trading rules to structured JSON."""
     
-    def __init__(self, provider: str = "gemini"):
+    def __init__(self, provider: str = "gemini", cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
         """
         Initialize the NL parser.
         
         Args:
             provider: LLM provider ("openai", "anthropic", or "gemini")
+            cache_dir: Directory of the on-disk response cache, or None to
+                always call the LLM (default: DEFAULT_CACHE_DIR)
         """
         self.provider = provider.lower()
         self.api_key = None
+        self.cache_dir = cache_dir
         self._setup_api()
     
     def _setup_api(self):
@@ -57,6 +120,16 @@ class NLParser:
                 self.client = genai
                 # Default to gemini-2.5-flash, fallback to gemini-2.0-flash-exp if not available
                 self.model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+                # The model and generation config are reused for every call
+                self._model = genai.GenerativeModel(self.model_name)
+                try:
+                    # JSON response format (supported in newer API versions)
+                    self._generation_config = genai.types.GenerationConfig(
+                        temperature=0.1,
+                        response_mime_type="application/json",
+                    )
+                except (AttributeError, TypeError):
+                    self._generation_config = {"temperature": 0.1}
                 self._call_llm = self._call_gemini
             except ImportError:
                 raise ImportError("google-generativeai package not installed. Install with: pip install google-generativeai")
@@ -94,23 +167,18 @@ class NLParser:
         full_prompt = f"{self._get_system_prompt()}\n\nUser input: {prompt}\n\nPlease respond with valid JSON only."
         
         try:
-            model = self.client.GenerativeModel(self.model_name)
-            
-            # Try with JSON response format (supported in newer API versions)
             try:
-                generation_config = self.client.types.GenerationConfig(
-                    temperature=0.1,
-                    response_mime_type="application/json",
-                )
-                response = model.generate_content(
+                response = self._model.generate_content(
                     full_prompt,
-                    generation_config=generation_config
+                    generation_config=self._generation_config
                 )
             except (AttributeError, TypeError):
-                # Fallback if response_mime_type not supported in this version
-                response = model.generate_content(
+                # Fallback if response_mime_type not supported in this version;
+                # remembered so later calls go straight to the plain config
+                self._generation_config = {"temperature": 0.1}
+                response = self._model.generate_content(
                     full_prompt,
-                    generation_config={"temperature": 0.1}
+                    generation_config=self._generation_config
                 )
             
             return response.text
@@ -119,48 +187,7 @@ class NLParser:
     
     def _get_system_prompt(self) -> str:
         """Get the system prompt for LLM."""
-        return """You are a trading strategy parser that converts natural language trading rules into structured JSON format.
-
-Convert the user's natural language trading instructions into a JSON object with the following structure:
-
-{
-  "entry": [
-    {
-      "left": "close",
-      "operator": ">",
-      "right": "sma(close,20)"
-    }
-  ],
-  "exit": [
-    {
-      "left": "rsi(close,14)",
-      "operator": "<",
-      "right": 30
-    }
-  ]
-}
-
-Rules:
-- "entry" and "exit" are arrays of condition objects
-- Each condition has "left", "operator", and "right" fields
-- Operators: ">", "<", ">=", "<=", "==", "!="
-- Series: "open", "high", "low", "close", "volume"
-- Indicators: "sma(series,period)", "rsi(series,period)", "ema(series,period)"
-- Time functions: "yesterday(series)", "last_week(series)", "n_days_ago(series,n)"
-- Cross functions: "crosses_above(series1,series2)", "crosses_below(series1,series2)"
-- Change functions: "change(series,n)", "percent_change(series,n)"
-- Numbers can be integers or floats
-- Percentages should be converted to numbers (e.g., "30 percent" -> 30)
-- Boolean logic: Multiple conditions in entry/exit arrays are combined with AND by default
-- For OR logic, use separate condition objects and mark them appropriately
-
-Examples:
-- "Buy when close is above 20-day moving average" -> {"left": "close", "operator": ">", "right": "sma(close,20)"}
-- "Exit when RSI(14) is below 30" -> {"left": "rsi(close,14)", "operator": "<", "right": 30}
-- "Enter when price crosses above yesterday's high" -> {"left": "close", "operator": "crosses_above", "right": "yesterday(high)"}
-- "Volume increases by more than 30 percent" -> {"left": "volume", "operator": ">", "right": "percent_change(volume,7) + 30"}
-
-Always return valid JSON only, no additional text."""
+        return _SYSTEM_PROMPT
     
     def parse(self, nl_text: str) -> Dict[str, Any]:
         """
@@ -172,24 +199,15 @@ Always return valid JSON only, no additional text."""
         Returns:
             Dictionary with "entry" and/or "exit" keys containing condition arrays
         """
+        key = self._cache_key(nl_text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self._call_llm(nl_text)
-            result = json.loads(response)
-            
-            # Validate structure
-            if not isinstance(result, dict):
-                raise ValueError("LLM response is not a dictionary")
-            
-            # Ensure entry and exit are lists
-            if "entry" in result and not isinstance(result["entry"], list):
-                result["entry"] = [result["entry"]] if result["entry"] else []
-            if "exit" in result and not isinstance(result["exit"], list):
-                result["exit"] = [result["exit"]] if result["exit"] else []
-            
-            # Ensure at least one section exists
-            if "entry" not in result and "exit" not in result:
-                raise ValueError("Response must contain at least 'entry' or 'exit'")
-            
+            result = self._validate_result(json.loads(response))
+            self._cache_put(key, result)
             return result
             
         except json.JSONDecodeError as e:
@@ -197,6 +215,95 @@ Always return valid JSON only, no additional text."""
         except Exception as e:
             raise ValueError(f"Error parsing natural language: {e}")
     
+    def parse_batch(self, nl_texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Parse several natural language rules with a single LLM call.
+        
+        The rules are numbered in one prompt and the model is asked for one
+        result per rule, in order. Rules already in the response cache are
+        not sent. If the batched response cannot be used (invalid JSON, wrong
+        count, a malformed item), each rule is parsed separately with parse()
+        instead.
+        
+        Args:
+            nl_texts: Natural language trading rule descriptions
+            
+        Returns:
+            List of dictionaries as returned by parse(), in the same order
+        """
+        keys = [self._cache_key(nl_text) for nl_text in nl_texts]
+        results = [self._cache_get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if len(missing) <= 1:
+            return [result if result is not None else self.parse(nl_texts[i])
+                    for i, result in enumerate(results)]
+        
+        numbered = "\n".join(f"{n}) {nl_texts[i]}" for n, i in enumerate(missing, 1))
+        prompt = (
+            f"Parse each of the following {len(missing)} trading rules separately. "
+            f'Return a JSON object {{"results": [...]}} whose "results" array holds exactly '
+            f"{len(missing)} objects, one per rule and in the same order, each with the "
+            f"structure described above.\n{numbered}"
+        )
+        
+        try:
+            response = json.loads(self._call_llm(prompt))
+            batch = response.get("results") if isinstance(response, dict) else response
+            if not isinstance(batch, list) or len(batch) != len(missing):
+                raise ValueError("Batched response does not have one result per rule")
+            batch = [self._validate_result(result) for result in batch]
+        except Exception:
+            batch = [self.parse(nl_texts[i]) for i in missing]
+        
+        for i, result in zip(missing, batch):
+            self._cache_put(keys[i], result)
+            results[i] = result
+        return results
+    
+    def _cache_key(self, nl_text: str) -> str:
+        """Response cache key: provider, model, system prompt and input text."""
+        payload = json.dumps([self.provider, getattr(self, "model_name", None), _SYSTEM_PROMPT, nl_text])
+        return hashlib.blake2b(payload.encode("utf-8")).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached parse result for key, or None; an unreadable cache counts as a miss."""
+        if self.cache_dir is None:
+            return None
+        try:
+            with shelve.open(os.path.join(self.cache_dir, "responses"), flag="r") as cache:
+                return cache.get(key)
+        except dbm.error:
+            return None
+    
+    def _cache_put(self, key: str, result: Dict[str, Any]):
+        """Store a validated parse result; failures to write the cache are ignored."""
+        if self.cache_dir is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with shelve.open(os.path.join(self.cache_dir, "responses")) as cache:
+                cache[key] = result
+        except dbm.error:
+            pass
+    
+    def _validate_result(self, result: Any) -> Dict[str, Any]:
+        """Check the structure of one parsed rule set and normalize entry/exit to lists."""
+        # Validate structure
+        if not isinstance(result, dict):
+            raise ValueError("LLM response is not a dictionary")
+        
+        # Ensure entry and exit are lists
+        if "entry" in result and not isinstance(result["entry"], list):
+            result["entry"] = [result["entry"]] if result["entry"] else []
+        if "exit" in result and not isinstance(result["exit"], list):
+            result["exit"] = [result["exit"]] if result["exit"] else []
+        
+        # Ensure at least one section exists
+        if "entry" not in result and "exit" not in result:
+            raise ValueError("Response must contain at least 'entry' or 'exit'")
+        
+        return result
+    
     def parse_with_fallback(self, nl_text: str) -> Dict[str, Any]:
         """
         Parse with regex fallback if LLM fails.
@@ -219,8 +326,6 @@ Always return valid JSON only, no additional text."""
         Simple regex-based fallback parser for common patterns.
         This handles basic cases when LLM is unavailable.
         """
-        import re
-        
         result = {"entry": [], "exit": []}
         text_lower = text.lower()
         
@@ -242,7 +347,7 @@ Always return valid JSON only, no additional text."""
         # Example: "close > sma(close,20)"
         if "above" in text_lower and "moving average" in text_lower:
             # Extract period
-            period_match = re.search(r'(\d+)[-\s]*day', text_lower)
+            period_match = _RE_PERIOD.search(text_lower)
             period = int(period_match.group(1)) if period_match else 20
             
             result["entry"].append({
@@ -253,10 +358,10 @@ Always return valid JSON only, no additional text."""
         
         # Example: "RSI < 30"
         if "rsi" in text_lower:
-            rsi_match = re.search(r'rsi[^\d]*(\d+)', text_lower)
+            rsi_match = _RE_RSI_PERIOD.search(text_lower)
             period = int(rsi_match.group(1)) if rsi_match else 14
             
-            value_match = re.search(r'(?:below|under|less than|<\s*)(\d+)', text_lower)
+            value_match = _RE_LESS.search(text_lower)
             value = int(value_match.group(1)) if value_match else 30
             
             result["exit"].append({
@@ -11,11 +11,21 @@ parent_dir = Path(__file__).parent.parent
 if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
+import functools
 import json
+from typing import Callable, Dict, Optional
+import numpy as np
 import pandas as pd
 from src.dsl_parser import parse_dsl_to_ast
 from src.code_generator import generate_code_from_ast
 from src.backtest import BacktestSimulator
+from src.indicators import calculate_indicators
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_dsl(dsl_text: str) -> Callable:
+    """Evaluator for a DSL string, generated once per distinct string."""
+    return generate_code_from_ast(parse_dsl_to_ast(dsl_text))
 
 
 def print_example_header(num: int, description: str):
@@ -30,8 +40,9 @@ def print_section(title: str):
     print(f"\n--- {title} ---")
 
 
-def run_dsl_example(dsl_text: str, description: str, example_num: int, df: pd.DataFrame):
-    """Run a single DSL example and print results."""
+def run_dsl_example(dsl_text: str, description: str, example_num: int, df: pd.DataFrame,
+                    indicator_cache: Optional[Dict] = None):
+    """Run a single DSL example and print results, reusing indicators from indicator_cache."""
     print_example_header(example_num, description)
     
     # Print DSL
@@ -50,7 +61,7 @@ def run_dsl_example(dsl_text: str, description: str, example_num: int, df: pd.Da
     # Generate evaluator function
     print_section("Code Generation")
     try:
-        evaluator = generate_code_from_ast(ast)
+        evaluator = _compile_dsl(dsl_text)
         print("[OK] Python evaluator function generated successfully")
     except Exception as e:
         print(f"ERROR: {e}")
@@ -59,9 +70,10 @@ def run_dsl_example(dsl_text: str, description: str, example_num: int, df: pd.Da
     # Execute on data
     print_section("Signal Generation")
     try:
-        signals = evaluator(df)
-        entry_count = signals['entry'].sum()
-        exit_count = signals['exit'].sum()
+        # The indicator columns were just computed from df by calculate_indicators()
+        signals = evaluator(df, indicator_cache, use_precomputed=True)
+        flags = signals[['entry', 'exit']].to_numpy()
+        entry_count, exit_count = flags.sum(axis=0)
         print(f"[OK] Generated signals:")
         print(f"  - Entry signals: {entry_count} days")
         print(f"  - Exit signals: {exit_count} days")
@@ -69,7 +81,8 @@ def run_dsl_example(dsl_text: str, description: str, example_num: int, df: pd.Da
         # Show sample signals
         if entry_count > 0 or exit_count > 0:
             print("\n  Sample signals (first 30 days with any signal):")
-            signal_days = signals[(signals['entry']) | (signals['exit'])].head(30)
+            signal_rows = np.flatnonzero(flags[:, 0] | flags[:, 1])[:30]
+            signal_days = signals.iloc[signal_rows]
             if len(signal_days) > 0:
                 print(signal_days.to_string())
     except Exception as e:
@@ -118,6 +131,10 @@ def main():
         df = pd.read_csv("data/sample_data.csv", index_col='date', parse_dates=True)
         print(f"[OK] Loaded {len(df)} days of data")
         print(f"  Date range: {df.index[0]} to {df.index[-1]}")
+        
+        # Precompute the common indicators (sma_20/50/200, rsi_14, ema_20/50)
+        # once; generated evaluators read these columns instead of recomputing
+        df = calculate_indicators(df)
     except Exception as e:
         print(f"ERROR loading data: {e}")
         return
@@ -182,9 +199,11 @@ close < last_week(low)"""
         }
     ]
     
-    # Run each example
+    # Run each example; they all use the same df, so indicators such as
+    # sma(close, 20) and rsi(close, 14) are computed once and shared
+    indicator_cache = {}
     for i, example in enumerate(examples, 1):
-        run_dsl_example(example["dsl"], example["description"], i, df)
+        run_dsl_example(example["dsl"], example["description"], i, df, indicator_cache)
     
     print("\n" + "=" * 80)
     print("ALL EXAMPLES COMPLETED")